@@ -2,12 +2,25 @@
 // --- Imports ---
 const express = require('express');
 const multer = require('multer'); // For handling multipart/form-data (file uploads)
-const { S3Client, GetObjectCommand, PutObjectCommand, HeadObjectCommand } = require('@aws-sdk/client-s3');
+const {
+    S3Client,
+    GetObjectCommand,
+    PutObjectCommand,
+    HeadObjectCommand,
+    CreateMultipartUploadCommand,
+    UploadPartCommand,
+    CompleteMultipartUploadCommand,
+    AbortMultipartUploadCommand,
+} = require('@aws-sdk/client-s3');
 const XLSX = require('xlsx'); // For reading XLSX files
 const csv = require('csv-parser'); // For parsing CSV streams
-const { Readable } = require('stream'); // Node.js stream utility
 const { v4: uuidv4 } = require('uuid'); // For generating unique IDs
 const cors = require('cors'); // For Cross-Origin Resource Sharing
+const https = require('https'); // For the S3 client's keep-alive connection pool
+const { promisify } = require('util');
+const zlib = require('zlib'); // For compressing converted CSV downloads
+
+const gzip = promisify(zlib.gzip);
 
 // --- Initialize Express App ---
 const app = express();
@@ -31,229 +44,653 @@ const AWS_REGION_NAME = process.env.AWS_DEFAULT_REGION || 'us-east-1'; // Defaul
 // IMPORTANT: Configure the S3 bucket where files will be uploaded
 const UPLOAD_S3_BUCKET_NAME = process.env.UPLOAD_S3_BUCKET_NAME || 'your-upload-s3-bucket'; // <<< CHANGE THIS in your environment
 
+// Multipart upload tuning: files larger than one part are split and the parts are sent in
+// parallel. 5 MB is the smallest part size S3 accepts.
+const UPLOAD_PART_SIZE = 5 * 1024 * 1024;
+const UPLOAD_QUEUE_SIZE = 10; // Number of parts uploaded concurrently
+
 const SLOTS_PER_DAY = 2; // You can change this to 3 or more if needed
 
-// Initialize S3 Client
+// Columns of the registration sheet used for scheduling; any other columns are ignored
+const REQUIRED_COLUMNS = ['Rollno', 'Name', 'Course Name'];
+
+const TIMETABLE_CACHE_SIZE = 32; // Number of generated timetables kept in memory
+
+// Initialize S3 Client once and share it across requests, so TLS connections are pooled and
+// kept alive instead of being set up again for every S3 call
 const s3Client = new S3Client({
     region: AWS_REGION_NAME,
     credentials: {
         accessKeyId: AWS_ACCESS_KEY_ID,
         secretAccessKey: AWS_SECRET_ACCESS_KEY,
     },
+    maxAttempts: 3,
+    retryMode: 'adaptive',
+    requestHandler: {
+        httpsAgent: new https.Agent({ keepAlive: true, maxSockets: 50 }),
+    },
 });
 
-// --- Global Variables (reset per request in functions) ---
-let studentSubjectsMap = new Map(); // Map<Rollno, Array<Subject>>
-let subjectToStudentsMap = new Map(); // Map<Subject, Array<{rollno, name}>>
+// --- Global Variables ---
+// LRU cache of generated timetables, keyed by S3 bucket, key and ETag. Entries are the
+// serialized JSON response, so repeat requests don't stringify the (potentially multi-MB)
+// timetable again. A Map keeps insertion order, so the first key is always the least
+// recently used entry.
+const timetableCache = new Map(); // Map<CacheKey, ResponseBody>
 
 // --- Helper Functions ---
 
 /**
- * Loads data from an S3 bucket, parses it (XLSX or CSV), and populates
- * studentSubjectsMap and subjectToStudentsMap.
+ * Logs an error raised while talking to S3 with a hint about the likely cause.
+ * @param {Error} error The error thrown by the S3 client.
  * @param {string} bucketName The S3 bucket name.
  * @param {string} fileKey The S3 object key (path to file).
- * @returns {Promise<boolean>} True if data loaded successfully, false otherwise.
  */
-async function loadDataFromS3(bucketName, fileKey) {
-    studentSubjectsMap = new Map(); // Reset for new request
-    subjectToStudentsMap = new Map(); // Reset for new request
+function logS3Error(error, bucketName, fileKey) {
+    // AWS SDK v3 has no per-error classes to test against; errors are identified by
+    // error.name, and S3 service errors carry the HTTP status in error.$metadata
+    const error_code = error.name;
+    const status_code = error.$metadata?.httpStatusCode;
+    if (error_code === 'CredentialsProviderError') {
+        console.error("Error: AWS credentials not found. Please configure AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY environment variables.");
+    } else if (error_code === 'NoSuchKey' || error_code === 'NotFound' || status_code === 404) {
+        // GetObject reports a missing key as NoSuchKey, HeadObject as NotFound
+        console.error(`Error: S3 object '${fileKey}' not found in bucket '${bucketName}'. Check file key and bucket name.`);
+    } else if (error_code === 'AccessDenied' || status_code === 403) {
+        console.error(`Error: Access denied to S3 bucket '${bucketName}' or object '${fileKey}'. Check IAM permissions and bucket policy.`);
+    } else if (error_code === 'PreconditionFailed' || status_code === 412) {
+        console.error(`Error: S3 object '${fileKey}' in bucket '${bucketName}' changed while it was being read. Retry the request.`);
+    } else if (status_code !== undefined) {
+        console.error(`Error accessing S3: ${error.message}`);
+    } else {
+        console.error(`Error loading data from S3: ${error.message}`);
+    }
+}
 
+/**
+ * Verifies that an S3 object exists and is accessible, and returns its ETag.
+ * @param {string} bucketName The S3 bucket name.
+ * @param {string} fileKey The S3 object key (path to file).
+ * @returns {Promise<string|null>} The object's ETag, or null if it could not be read.
+ */
+async function getS3ObjectETag(bucketName, fileKey) {
     try {
-        // Verify file existence and access
-        await s3Client.send(new HeadObjectCommand({ Bucket: bucketName, Key: fileKey }));
+        const { ETag } = await s3Client.send(new HeadObjectCommand({ Bucket: bucketName, Key: fileKey }));
+        return ETag;
+    } catch (error) {
+        logS3Error(error, bucketName, fileKey);
+        return null;
+    }
+}
 
-        const { Body } = await s3Client.send(new GetObjectCommand({ Bucket: bucketName, Key: fileKey }));
+/**
+ * Uploads a buffer to S3. Buffers larger than UPLOAD_PART_SIZE are sent as a multipart
+ * upload with up to UPLOAD_QUEUE_SIZE parts in flight at once; smaller ones use a single PutObject.
+ * @param {{Bucket: string, Key: string, Body: Buffer, ContentType: string}} uploadParams The object to upload.
+ * @returns {Promise<void>} Resolves once the object is stored; a failed multipart upload is aborted.
+ */
+async function uploadToS3(uploadParams) {
+    const { Bucket, Key, Body, ContentType } = uploadParams;
+    if (Body.length <= UPLOAD_PART_SIZE) {
+        await s3Client.send(new PutObjectCommand(uploadParams));
+        return;
+    }
 
-        if (!Body) {
-            console.error(`S3 object body is empty for ${fileKey}`);
-            return false;
+    const { UploadId } = await s3Client.send(new CreateMultipartUploadCommand({ Bucket, Key, ContentType }));
+    const partCount = Math.ceil(Body.length / UPLOAD_PART_SIZE);
+    let nextPart = 0;
+    try {
+        const parts = new Array(partCount);
+
+        // Each worker keeps taking the next unsent part until all parts are uploaded
+        const uploadParts = async () => {
+            while (nextPart < partCount) {
+                const index = nextPart++;
+                const start = index * UPLOAD_PART_SIZE;
+                const { ETag } = await s3Client.send(new UploadPartCommand({
+                    Bucket,
+                    Key,
+                    UploadId,
+                    PartNumber: index + 1,
+                    Body: Body.subarray(start, start + UPLOAD_PART_SIZE),
+                }));
+                parts[index] = { ETag, PartNumber: index + 1 };
+            }
+        };
+        await Promise.all(Array.from({ length: Math.min(UPLOAD_QUEUE_SIZE, partCount) }, uploadParts));
+
+        await s3Client.send(new CompleteMultipartUploadCommand({ Bucket, Key, UploadId, MultipartUpload: { Parts: parts } }));
+    } catch (error) {
+        nextPart = partCount; // Stop the other workers from starting new parts
+        // Don't leave the already uploaded parts behind (S3 bills for them until aborted)
+        await s3Client.send(new AbortMultipartUploadCommand({ Bucket, Key, UploadId })).catch(() => {});
+        throw error;
+    }
+}
+
+/**
+ * Looks up a previously generated timetable and marks it as most recently used.
+ * @param {string} cacheKey The key built from bucket, file key and ETag.
+ * @returns {string|undefined} The cached JSON response body, if any.
+ */
+function getCachedTimetable(cacheKey) {
+    const body = timetableCache.get(cacheKey);
+    if (body !== undefined) {
+        timetableCache.delete(cacheKey);
+        timetableCache.set(cacheKey, body);
+    }
+    return body;
+}
+
+/**
+ * Stores a generated timetable, evicting the least recently used entry when full.
+ * @param {string} cacheKey The key built from bucket, file key and ETag.
+ * @param {string} body The JSON response body for the timetable.
+ */
+function cacheTimetable(cacheKey, body) {
+    timetableCache.set(cacheKey, body);
+    if (timetableCache.size > TIMETABLE_CACHE_SIZE) {
+        timetableCache.delete(timetableCache.keys().next().value);
+    }
+}
+
+/**
+ * Loads data from an S3 bucket, parses it (XLSX or CSV), and builds the
+ * student-to-subjects and subject-to-students maps for this request.
+ * @param {string} bucketName The S3 bucket name.
+ * @param {string} fileKey The S3 object key (path to file).
+ * @param {string} etag The ETag returned by getS3ObjectETag; the read fails if the object changed since.
+ * @returns {Promise<{studentSubjectsMap: Map<string, Array<string>>, subjectToStudentsMap: Map<string, Array<{rollno: string, name: string}>>}|null>}
+ *     The loaded maps, or null if the data could not be loaded.
+ */
+async function loadDataFromS3(bucketName, fileKey, etag) {
+    const studentSubjectsMap = new Map(); // Map<Rollno, Array<Subject>>
+    const subjectToStudentsMap = new Map(); // Map<Subject, Array<{rollno, name}>>
+
+    try {
+        const lowerFileKey = fileKey.toLowerCase();
+        if (!lowerFileKey.endsWith('.csv') && !lowerFileKey.endsWith('.xlsx')) {
+            console.error(`Unsupported file format for S3 key: ${fileKey}. Only .csv and .xlsx are supported.`);
+            return null;
         }
 
-        const chunks = [];
-        for await (const chunk of Body) {
-            chunks.push(chunk);
+        const { Body } = await s3Client.send(new GetObjectCommand({ Bucket: bucketName, Key: fileKey, IfMatch: etag }));
+
+        if (!Body) {
+            console.error(`S3 object body is empty for ${fileKey}`);
+            return null;
         }
-        const buffer = Buffer.concat(chunks);
 
         let df; // This will simulate a DataFrame (array of objects)
 
-        if (fileKey.toLowerCase().endsWith('.csv')) {
+        if (lowerFileKey.endsWith('.csv')) {
             const results = [];
-            const readableStream = Readable.from(buffer.toString('utf-8'));
+            // Stream the S3 body straight into csv-parser (it decodes UTF-8 itself) instead of
+            // buffering the whole object first, and keep only the required columns, so wide
+            // sheets don't build objects full of unused fields.
             await new Promise((resolve, reject) => {
-                readableStream
-                    .pipe(csv())
+                Body
+                    .on('error', (err) => reject(err))
+                    .pipe(csv({ mapHeaders: ({ header }) => (REQUIRED_COLUMNS.includes(header) ? header : null) }))
                     .on('data', (data) => results.push(data))
                     .on('end', () => resolve())
                     .on('error', (err) => reject(err));
             });
             df = results;
-        } else if (fileKey.toLowerCase().endsWith('.xlsx')) {
-            const workbook = XLSX.read(buffer, { type: 'buffer' });
+        } else {
+            // XLSX is a zip archive and needs random access, so buffer it in full
+            const chunks = [];
+            for await (const chunk of Body) {
+                chunks.push(chunk);
+            }
+            const buffer = Buffer.concat(chunks);
+
+            // Only the first sheet is used, so skip parsing the others. sheet_to_json reads raw
+            // cell values, so the formatted text and HTML of each cell aren't needed either.
+            const workbook = XLSX.read(buffer, { type: 'buffer', sheets: 0, cellText: false, cellHTML: false });
             const sheetName = workbook.SheetNames[0]; // Assume first sheet
             df = XLSX.utils.sheet_to_json(workbook.Sheets[sheetName]);
-        } else {
-            console.error(`Unsupported file format for S3 key: ${fileKey}. Only .csv and .xlsx are supported.`);
-            return false;
         }
 
         if (!df || df.length === 0) {
             console.error("No data parsed from file.");
-            return false;
+            return null;
         }
 
-        // Filter out rows with missing 'Rollno', 'Name', or 'Course Name'
-        const filteredDf = df.filter(row =>
-            row['Rollno'] !== undefined && row['Rollno'] !== null && row['Rollno'] !== '' &&
-            row['Name'] !== undefined && row['Name'] !== null && row['Name'] !== '' &&
-            row['Course Name'] !== undefined && row['Course Name'] !== null && row['Course Name'] !== ''
-        );
-
-        if (filteredDf.length === 0) {
-            console.error("No valid data rows after filtering for missing values.");
-            return false;
-        }
+        // Filter out rows with missing 'Rollno', 'Name', or 'Course Name' and populate
+        // studentSubjectsMap and subjectToStudentsMap in the same pass, so the parsed
+        // rows are walked once and no intermediate filtered array is materialized.
+        // Students are collected per subject in a Map keyed by roll number, so checking for
+        // duplicates is a hash lookup instead of a scan over everyone already enrolled.
+        const studentNamesBySubject = new Map(); // Map<Subject, Map<Rollno, Name>>
+        let validRows = 0;
+        for (const row of df) {
+            // Read each column once per row
+            const { 'Rollno': rawRollno, 'Name': rawName, 'Course Name': rawCourseName } = row;
+            if (
+                rawRollno === undefined || rawRollno === null || rawRollno === '' ||
+                rawName === undefined || rawName === null || rawName === '' ||
+                rawCourseName === undefined || rawCourseName === null || rawCourseName === ''
+            ) {
+                continue;
+            }
+            validRows++;
 
-        // Populate studentSubjectsMap and subjectToStudentsMap
-        for (const row of filteredDf) {
-            const rollno = String(row['Rollno']); // Ensure string type
-            const name = String(row['Name']);
-            const courseName = String(row['Course Name']);
+            const rollno = String(rawRollno); // Ensure string type
+            const name = String(rawName);
+            const courseName = String(rawCourseName);
 
-            // Update studentSubjectsMap
-            if (!studentSubjectsMap.has(rollno)) {
-                studentSubjectsMap.set(rollno, []);
+            // Update studentSubjectsMap (one lookup when the student is already known)
+            let subjectsOfStudent = studentSubjectsMap.get(rollno);
+            if (subjectsOfStudent === undefined) {
+                subjectsOfStudent = [];
+                studentSubjectsMap.set(rollno, subjectsOfStudent);
             }
-            studentSubjectsMap.get(rollno).push(courseName);
+            subjectsOfStudent.push(courseName);
 
-            // Update subjectToStudentsMap
-            if (!subjectToStudentsMap.has(courseName)) {
-                subjectToStudentsMap.set(courseName, []);
+            // Collect students per subject (one lookup when the subject is already known)
+            let studentsInSubject = studentNamesBySubject.get(courseName);
+            if (studentsInSubject === undefined) {
+                studentsInSubject = new Map();
+                studentNamesBySubject.set(courseName, studentsInSubject);
             }
-            const studentsInSubject = subjectToStudentsMap.get(courseName);
-            const studentExists = studentsInSubject.some(s => s.rollno === rollno);
-            if (!studentExists) {
-                studentsInSubject.push({ rollno, name });
+            if (!studentsInSubject.has(rollno)) {
+                studentsInSubject.set(rollno, name);
             }
         }
 
+        // Populate subjectToStudentsMap from the deduplicated students
+        for (const [courseName, studentsInSubject] of studentNamesBySubject) {
+            subjectToStudentsMap.set(courseName, Array.from(studentsInSubject, ([rollno, name]) => ({ rollno, name })));
+        }
+
+        if (validRows === 0) {
+            console.error("No valid data rows after filtering for missing values.");
+            return null;
+        }
+
         console.log(`Data loaded successfully from S3. Found ${studentSubjectsMap.size} students.`);
-        return true;
+        return { studentSubjectsMap, subjectToStudentsMap };
 
     } catch (error) {
-        if (error instanceof NoCredentialsError) {
-            console.error("Error: AWS credentials not found. Please configure AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY environment variables.");
-        } else if (error instanceof ClientError) {
-            const error_code = error.name; // Use error.name for AWS SDK v3
-            if (error_code === 'NoSuchKey') {
-                console.error(`Error: S3 object '${fileKey}' not found in bucket '${bucketName}'. Check file key and bucket name.`);
-            } else if (error_code === 'AccessDenied') {
-                console.error(`Error: Access denied to S3 bucket '${bucketName}' or object '${fileKey}'. Check IAM permissions and bucket policy.`);
-            } else {
-                console.error(`Error accessing S3: ${error.message}`);
-            }
-        } else {
-            console.error(`Error loading data from S3: ${error.message}`);
-        }
-        return false;
+        logS3Error(error, bucketName, fileKey);
+        return null;
     }
 }
 
+/**
+ * @typedef {Object} ConflictGraph
+ * @property {Array<string>} subjects Subject names, indexed by vertex id.
+ * @property {Array<Set<number>>} adjacency The vertex ids conflicting with each vertex.
+ */
+
 /**
  * Builds the conflict graph where nodes are subjects and edges represent conflicts.
  * A conflict exists if at least one student is registered for both subjects.
- * @returns {Map<string, Set<string>>} The adjacency list representation of the conflict graph.
+ * Subjects are factorized to contiguous integer vertex ids, so the graph and the coloring
+ * work on small integers and names are only looked up again when the timetable is formatted.
+ * @param {Map<string, Array<string>>} studentSubjectsMap Map of roll numbers to their registered subjects.
+ * @param {Map<string, Array<{rollno: string, name: string}>>} subjectToStudentsMap Map of subjects to their
+ *     enrolled students; its keys are exactly the subjects in studentSubjectsMap.
+ * @returns {ConflictGraph} The adjacency list representation of the conflict graph.
  */
-function buildConflictGraph() {
-    const conflictGraph = new Map(); // Adjacency list: Map<Subject, Set<ConflictingSubject>>
-
+function buildConflictGraph(studentSubjectsMap, subjectToStudentsMap) {
     if (studentSubjectsMap.size === 0) {
         console.error("Error: Student-subject map is empty. Load data first.");
-        return conflictGraph;
+        return { subjects: [], adjacency: [] };
     }
 
-    const allSubjects = new Set();
-    for (const subjects of studentSubjectsMap.values()) {
-        subjects.forEach(subject => allSubjects.add(subject));
+    // Initialize graph with all subjects as nodes, taken from the subject map's keys
+    // rather than collected again from every student's registrations
+    const subjects = Array.from(subjectToStudentsMap.keys());
+    const vertexOf = new Map(subjects.map((subject, vertex) => [subject, vertex])); // Map<Subject, VertexId>
+    const adjacency = subjects.map(() => new Set());
+
+    for (const registered of studentSubjectsMap.values()) {
+        // Duplicate registrations are dropped, so every pair below is distinct and the
+        // quadratic loop only runs over the student's unique subjects
+        const vertexSet = new Set();
+        for (const subject of registered) {
+            vertexSet.add(vertexOf.get(subject));
+        }
+
+        // Identify conflicts: if a student takes two subjects, add an edge between them
+        const vertices = [...vertexSet];
+        for (let i = 0; i < vertices.length; i++) {
+            const vertex1 = vertices[i];
+            const neighbors1 = adjacency[vertex1];
+            for (let j = i + 1; j < vertices.length; j++) {
+                neighbors1.add(vertices[j]);
+                adjacency[vertices[j]].add(vertex1);
+            }
+        }
     }
 
-    // Initialize graph with all subjects as nodes
-    allSubjects.forEach(subject => conflictGraph.set(subject, new Set()));
+    console.log(`Conflict graph built with ${subjects.length} subjects and ${adjacency.reduce((sum, set) => sum + set.size, 0) / 2} conflicts.`);
+    return { subjects, adjacency };
+}
 
-    // Identify conflicts: if a student takes two subjects, add an edge between them
-    for (const subjects of studentSubjectsMap.values()) {
-        for (let i = 0; i < subjects.length; i++) {
-            for (let j = i + 1; j < subjects.length; j++) {
-                const subject1 = subjects[i];
-                const subject2 = subjects[j];
-                if (subject1 !== subject2) {
-                    conflictGraph.get(subject1).add(subject2);
-                    conflictGraph.get(subject2).add(subject1);
-                }
-            }
+/**
+ * Converts the conflict graph into compressed sparse row (CSR) form: the neighbors of
+ * vertex v are indices[indptr[v]] .. indices[indptr[v + 1] - 1].
+ * @param {ConflictGraph} graph The conflict graph as an adjacency list.
+ * @returns {{indptr: Int32Array, indices: Int32Array}} The CSR arrays.
+ */
+function toCsrAdjacency(graph) {
+    const vertexCount = graph.adjacency.length;
+
+    const indptr = new Int32Array(vertexCount + 1);
+    for (let v = 0; v < vertexCount; v++) {
+        indptr[v + 1] = indptr[v] + graph.adjacency[v].size;
+    }
+
+    const indices = new Int32Array(indptr[vertexCount]);
+    for (let v = 0; v < vertexCount; v++) {
+        let e = indptr[v];
+        for (const neighbor of graph.adjacency[v]) {
+            indices[e++] = neighbor;
         }
     }
 
-    console.log(`Conflict graph built with ${conflictGraph.size} subjects and ${[...conflictGraph.values()].reduce((sum, set) => sum + set.size, 0) / 2} conflicts.`);
-    return conflictGraph;
+    return { indptr, indices };
 }
 
 /**
- * Implements a greedy graph coloring algorithm.
+ * Implements a greedy graph coloring algorithm over CSR adjacency arrays.
  * Assigns a color (slot number) to each subject such that no two conflicting subjects have the same color.
- * @param {Map<string, Set<string>>} graph The conflict graph as an adjacency list.
- * @returns {Map<string, number>} A map from subject name to its assigned slot index (color).
+ * The colors used by a vertex's neighbors are kept as a bitmask in 32-bit words, and the smallest
+ * free color is the lowest zero bit, found with Math.clz32 on the first word that is not full
+ * instead of probing color by color. A vertex of degree d always gets a color <= d, so only the
+ * first ceil((d + 1) / 32) words are cleared and consulted for it.
+ * @param {{indptr: Int32Array, indices: Int32Array}} csr The conflict graph in CSR form.
+ * @param {Int32Array} order The order in which vertices are colored.
+ * @returns {Int32Array} The slot index (color) assigned to each vertex.
  */
-function greedyColoring(graph) {
-    const coloring = new Map(); // Map<Subject, SlotIndex>
-    const subjects = Array.from(graph.keys());
-
-    // Sort subjects by degree (number of conflicts) in descending order
-    subjects.sort((a, b) => graph.get(b).size - graph.get(a).size);
-
-    for (const subject of subjects) {
-        const usedColors = new Set();
-        // Check colors of neighbors
-        for (const neighbor of graph.get(subject)) {
-            if (coloring.has(neighbor)) {
-                usedColors.add(coloring.get(neighbor));
+function greedyColoring({ indptr, indices }, order) {
+    const vertexCount = indptr.length - 1;
+    let maxDegree = 0;
+    for (let v = 0; v < vertexCount; v++) {
+        maxDegree = Math.max(maxDegree, indptr[v + 1] - indptr[v]);
+    }
+
+    const colors = new Int32Array(vertexCount).fill(-1);
+    const usedMask = new Uint32Array((maxDegree >>> 5) + 1);
+
+    for (let k = 0; k < order.length; k++) {
+        const v = order[k];
+        const wordCount = ((indptr[v + 1] - indptr[v]) >>> 5) + 1;
+        usedMask.fill(0, 0, wordCount);
+
+        for (let e = indptr[v]; e < indptr[v + 1]; e++) {
+            const neighborColor = colors[indices[e]];
+            const word = neighborColor >>> 5;
+            if (neighborColor >= 0 && word < wordCount) {
+                usedMask[word] |= 1 << (neighborColor & 31);
             }
         }
 
-        // Find the smallest available color
+        // Find the smallest available color: the lowest zero bit of the first non-full word
+        let word = 0;
+        while (usedMask[word] === 0xFFFFFFFF) {
+            word++;
+        }
+        const free = ~usedMask[word];
+        colors[v] = (word << 5) + (31 - Math.clz32(free & -free));
+    }
+
+    return colors;
+}
+
+/**
+ * Orders vertices by degree (number of conflicts) in descending order.
+ * @param {{indptr: Int32Array, indices: Int32Array}} csr The conflict graph in CSR form.
+ * @returns {Int32Array} The vertices, most conflicted first.
+ */
+function largestFirstOrder({ indptr }) {
+    const degree = (v) => indptr[v + 1] - indptr[v];
+    return Int32Array.from({ length: indptr.length - 1 }, (_, v) => v).sort((a, b) => degree(b) - degree(a));
+}
+
+/**
+ * Orders vertices so that each one has as few already-ordered neighbors as possible:
+ * repeatedly removes a minimum-degree vertex and colors them in reverse removal order.
+ * @param {{indptr: Int32Array, indices: Int32Array}} csr The conflict graph in CSR form.
+ * @returns {Int32Array} The smallest-last ordering of the vertices.
+ */
+function smallestLastOrder({ indptr, indices }) {
+    const vertexCount = indptr.length - 1;
+    const degrees = new Int32Array(vertexCount); // Remaining degree, or -1 once removed
+    const buckets = []; // buckets[d] = Set of remaining vertices with degree d
+    for (let v = 0; v < vertexCount; v++) {
+        degrees[v] = indptr[v + 1] - indptr[v];
+        (buckets[degrees[v]] ||= new Set()).add(v);
+    }
+
+    const order = new Int32Array(vertexCount);
+    let minDegree = 0;
+    for (let removed = 0; removed < vertexCount; removed++) {
+        // A removal lowers neighbor degrees by at most one, so the minimum can drop by one
+        minDegree = Math.max(minDegree - 1, 0);
+        while (!buckets[minDegree] || buckets[minDegree].size === 0) {
+            minDegree++;
+        }
+
+        const v = buckets[minDegree].values().next().value;
+        buckets[minDegree].delete(v);
+        degrees[v] = -1;
+        order[vertexCount - 1 - removed] = v;
+
+        for (let e = indptr[v]; e < indptr[v + 1]; e++) {
+            const u = indices[e];
+            const degree = degrees[u];
+            if (degree >= 0) {
+                buckets[degree].delete(u);
+                degrees[u] = degree - 1;
+                (buckets[degree - 1] ||= new Set()).add(u);
+            }
+        }
+    }
+
+    return order;
+}
+
+/**
+ * Orders vertices breadth-first within each connected component, so every vertex
+ * after the first of its component is adjacent to one that is already colored.
+ * @param {{indptr: Int32Array, indices: Int32Array}} csr The conflict graph in CSR form.
+ * @returns {Int32Array} The connected sequential BFS ordering of the vertices.
+ */
+function connectedSequentialBfsOrder({ indptr, indices }) {
+    const vertexCount = indptr.length - 1;
+    const order = new Int32Array(vertexCount);
+    const visited = new Uint8Array(vertexCount);
+    let tail = 0;
+    for (let root = 0; root < vertexCount; root++) {
+        if (visited[root]) {
+            continue;
+        }
+        visited[root] = 1;
+        order[tail++] = root;
+        for (let head = tail - 1; head < tail; head++) {
+            const v = order[head];
+            for (let e = indptr[v]; e < indptr[v + 1]; e++) {
+                const u = indices[e];
+                if (!visited[u]) {
+                    visited[u] = 1;
+                    order[tail++] = u;
+                }
+            }
+        }
+    }
+    return order;
+}
+
+/**
+ * Implements the DSATUR coloring algorithm: always colors next the vertex whose neighbors
+ * already use the most distinct colors, breaking ties by degree.
+ * @param {{indptr: Int32Array, indices: Int32Array}} csr The conflict graph in CSR form.
+ * @returns {Int32Array} The slot index (color) assigned to each vertex.
+ */
+function dsaturColoring({ indptr, indices }) {
+    const vertexCount = indptr.length - 1;
+    const colors = new Int32Array(vertexCount).fill(-1);
+    const neighborColors = Array.from({ length: vertexCount }, () => new Set()); // Colors seen around each vertex
+
+    for (let colored = 0; colored < vertexCount; colored++) {
+        let next = -1;
+        let bestSaturation = -1;
+        let bestDegree = -1;
+        for (let v = 0; v < vertexCount; v++) {
+            if (colors[v] !== -1) {
+                continue;
+            }
+            const saturation = neighborColors[v].size;
+            const degree = indptr[v + 1] - indptr[v];
+            if (saturation > bestSaturation || (saturation === bestSaturation && degree > bestDegree)) {
+                next = v;
+                bestSaturation = saturation;
+                bestDegree = degree;
+            }
+        }
+
+        const usedColors = neighborColors[next];
         let color = 0;
         while (usedColors.has(color)) {
             color++;
         }
-        coloring.set(subject, color);
+        colors[next] = color;
+
+        for (let e = indptr[next]; e < indptr[next + 1]; e++) {
+            const u = indices[e];
+            if (colors[u] === -1) {
+                neighborColors[u].add(color);
+            }
+        }
     }
 
-    return coloring;
+    return colors;
 }
 
 /**
- * Generates the examination timetable from the coloring result.
- * @param {Map<string, number>} coloring A map from subject name to its assigned slot index.
- * @param {Map<string, Array<{rollno: string, name: string}>>} subjectToStudentsMap Map of subjects to their enrolled students.
- * @returns {Array<Object>} Formatted timetable with subjects, slots, and student details.
+ * Two-colors the graph by breadth-first search if it is bipartite.
+ * @param {{indptr: Int32Array, indices: Int32Array}} csr The conflict graph in CSR form.
+ * @returns {Int32Array|null} The color (0 or 1) of each vertex, or null if the graph has an odd cycle.
  */
-function generateTimetableSlots(coloring, subjectToStudentsMap) {
-    const formattedTimetable = [];
+function bipartiteColoring({ indptr, indices }) {
+    const vertexCount = indptr.length - 1;
+    const colors = new Int32Array(vertexCount).fill(-1);
+    const queue = new Int32Array(vertexCount);
+
+    for (let root = 0; root < vertexCount; root++) {
+        if (colors[root] !== -1) {
+            continue;
+        }
+        colors[root] = 0;
+        let head = 0;
+        let tail = 0;
+        queue[tail++] = root;
+        while (head < tail) {
+            const v = queue[head++];
+            for (let e = indptr[v]; e < indptr[v + 1]; e++) {
+                const u = indices[e];
+                if (colors[u] === -1) {
+                    colors[u] = 1 - colors[v];
+                    queue[tail++] = u;
+                } else if (colors[u] === colors[v]) {
+                    return null;
+                }
+            }
+        }
+    }
 
-    for (const [subject, slotIndex] of coloring.entries()) {
-        const dayNum = Math.floor(slotIndex / SLOTS_PER_DAY) + 1;
-        const slotInDay = (slotIndex % SLOTS_PER_DAY) + 1;
-        const slotName = `Day-${dayNum} Slot-${slotInDay}`;
+    return colors;
+}
 
-        const studentsForSubject = subjectToStudentsMap.get(subject) || [];
+/**
+ * Colors graphs whose optimal coloring is known without a search: no conflicts (one slot),
+ * every pair of subjects conflicting (one slot each) and bipartite graphs (two slots).
+ * @param {{indptr: Int32Array, indices: Int32Array}} csr The conflict graph in CSR form.
+ * @returns {{colors: Int32Array, topology: string}|null} The coloring and the topology it was
+ *     derived from, or null if the graph is none of these.
+ */
+function colorTrivialTopology(csr) {
+    const vertexCount = csr.indptr.length - 1;
+    // Each conflict appears twice in the CSR arrays, once per endpoint
+    if (csr.indices.length === 0) {
+        return { colors: new Int32Array(vertexCount), topology: 'conflict-free' };
+    }
+    if (csr.indices.length === vertexCount * (vertexCount - 1)) {
+        return { colors: Int32Array.from({ length: vertexCount }, (_, v) => v), topology: 'complete' };
+    }
+    const colors = bipartiteColoring(csr);
+    return colors === null ? null : { colors, topology: 'bipartite' };
+}
 
-        formattedTimetable.push({
-            subject: subject,
-            slot: slotName,
-            students: studentsForSubject,
-        });
+// Coloring strategies tried for every timetable; the one needing the fewest slots wins
+const COLORING_STRATEGIES = {
+    DSATUR: (csr) => dsaturColoring(csr),
+    largest_first: (csr) => greedyColoring(csr, largestFirstOrder(csr)),
+    smallest_last: (csr) => greedyColoring(csr, smallestLastOrder(csr)),
+    connected_sequential_bfs: (csr) => greedyColoring(csr, connectedSequentialBfsOrder(csr)),
+};
+
+/**
+ * Colors the conflict graph with every strategy in COLORING_STRATEGIES and keeps the
+ * coloring that uses the fewest slots (earlier strategies win ties). Graphs with a trivial
+ * topology are colored optimally up front and skip the strategies entirely.
+ * @param {ConflictGraph} graph The conflict graph as an adjacency list.
+ * @returns {{colors: Int32Array, strategy: string|null, topology: string|null, slotCount: number}}
+ *     The slot index of each vertex in the best coloring found. For a trivial topology, topology
+ *     names it and strategy is null; otherwise strategy names the winning strategy and topology is null.
+ */
+function colorConflictGraph(graph) {
+    const csr = toCsrAdjacency(graph);
+    const countSlots = (colors) => colors.reduce((max, color) => Math.max(max, color + 1), 0);
+
+    const trivial = colorTrivialTopology(csr);
+    if (trivial !== null) {
+        const slotCount = countSlots(trivial.colors);
+        console.log(`Conflict graph is ${trivial.topology}; colored directly with ${slotCount} slots.`);
+        return { colors: trivial.colors, strategy: null, topology: trivial.topology, slotCount };
+    }
+
+    let best = null;
+    for (const [strategy, colorGraph] of Object.entries(COLORING_STRATEGIES)) {
+        const colors = colorGraph(csr);
+        const slotCount = countSlots(colors);
+        if (best === null || slotCount < best.slotCount) {
+            best = { colors, strategy, topology: null, slotCount };
+        }
     }
+
+    console.log(`Coloring strategy '${best.strategy}' used ${best.slotCount} slots.`);
+    return best;
+}
+
+/**
+ * Generates the examination timetable from the coloring result.
+ * @param {Array<string>} subjects Subject names, indexed by vertex id.
+ * @param {Int32Array} colors The slot index assigned to each vertex.
+ * @param {Map<string, Array<{rollno: string, name: string}>>} subjectToStudentsMap Map of subjects to their enrolled students.
+ * @returns {Array<Object>} Formatted timetable with subjects, slots, and student details.
+ */
+function generateTimetableSlots(subjects, colors, subjectToStudentsMap) {
+    // Slot names are built once per slot index rather than once per subject
+    const slotNames = [];
+    const slotName = (slotIndex) => {
+        if (slotNames[slotIndex] === undefined) {
+            const dayNum = Math.floor(slotIndex / SLOTS_PER_DAY) + 1;
+            const slotInDay = (slotIndex % SLOTS_PER_DAY) + 1;
+            slotNames[slotIndex] = `Day-${dayNum} Slot-${slotInDay}`;
+        }
+        return slotNames[slotIndex];
+    };
+
+    const formattedTimetable = subjects.map((subject, vertex) => ({
+        subject: subject,
+        slot: slotName(colors[vertex]),
+        students: subjectToStudentsMap.get(subject) || [],
+    }));
     console.log("Timetable generated successfully.");
     return formattedTimetable;
 }
@@ -281,42 +718,67 @@ app.get('/generate_timetable', async (req, res) => {
         });
     }
 
-    // Load data from S3
-    const dataLoaded = await loadDataFromS3(bucket_name, file_key);
-    if (!dataLoaded) {
+    // Verify file existence and access; the ETag identifies this version of the file
+    const etag = await getS3ObjectETag(bucket_name, file_key);
+    if (!etag) {
         return res.status(500).json({
             status: "error",
             message: "Failed to load data from S3. Check server logs, S3 configuration, and provided bucket/key."
         });
     }
 
-    // Build conflict graph
-    const conflictGraph = buildConflictGraph();
-    if (conflictGraph.size === 0) {
-        return res.status(500).json({
-            status: "error",
-            message: "Failed to build conflict graph (no subjects or valid data). Check server logs for details."
+    // Reuse the timetable if this exact file version was already scheduled
+    const cacheKey = JSON.stringify([bucket_name, file_key, etag]);
+    let body = getCachedTimetable(cacheKey);
+
+    if (body === undefined) {
+        // Load data from S3
+        const data = await loadDataFromS3(bucket_name, file_key, etag);
+        if (!data) {
+            return res.status(500).json({
+                status: "error",
+                message: "Failed to load data from S3. Check server logs, S3 configuration, and provided bucket/key."
+            });
+        }
+
+        // Build conflict graph
+        const conflictGraph = buildConflictGraph(data.studentSubjectsMap, data.subjectToStudentsMap);
+        if (conflictGraph.subjects.length === 0) {
+            return res.status(500).json({
+                status: "error",
+                message: "Failed to build conflict graph (no subjects or valid data). Check server logs for details."
+            });
+        }
+
+        // Generate timetable
+        const { colors, strategy, topology } = colorConflictGraph(conflictGraph);
+        const timetable = generateTimetableSlots(conflictGraph.subjects, colors, data.subjectToStudentsMap);
+
+        // Serialize once; the cached string is sent as-is on later requests
+        body = JSON.stringify({
+            status: "success",
+            message: "Timetable generated successfully.",
+            timetable: timetable,
+            notes: [
+                `This timetable uses abstract 'Day-X Slot-Y' assignments.`,
+                `The number of slots per day is configured as ${SLOTS_PER_DAY}.`,
+                `No student will have two exams in the same slot.`,
+                `All campuses are assumed to have the exam for a given subject on the same day and slot.`,
+                topology !== null
+                    ? `The conflict graph is ${topology}, so it was colored optimally without comparing coloring strategies.`
+                    : `Slots were assigned with the '${strategy}' coloring strategy, which needed the fewest slots.`
+            ]
         });
+        cacheTimetable(cacheKey, body);
     }
 
-    // Generate timetable
-    const coloring = greedyColoring(conflictGraph);
-    const timetable = generateTimetableSlots(coloring, subjectToStudentsMap);
-
-    res.json({
-        status: "success",
-        message: "Timetable generated successfully.",
-        timetable: timetable,
-        notes: [
-            `This timetable uses abstract 'Day-X Slot-Y' assignments.`,
-            `The number of slots per day is configured as ${SLOTS_PER_DAY}.`,
-            `No student will have two exams in the same slot.`,
-            `All campuses are assumed to have the exam for a given subject on the same day and slot.`
-        ]
-    });
+    res.type('application/json').send(body);
 });
 
-app.post('/convert_xlsx_to_csv', upload.single('file'), (req, res) => {
+app.post('/convert_xlsx_to_csv', upload.single('file'), async (req, res) => {
+    // 'csv' (default) returns plain text; 'csv.gz' returns the same CSV gzip-compressed
+    const format = req.query.format || 'csv';
+
     if (!req.file) {
         return res.status(400).json({ status: "error", message: "No file part in the request" });
     }
@@ -325,14 +787,25 @@ app.post('/convert_xlsx_to_csv', upload.single('file'), (req, res) => {
         return res.status(400).json({ status: "error", message: "Invalid file type. Only .xlsx files are supported." });
     }
 
+    if (format !== 'csv' && format !== 'csv.gz') {
+        return res.status(400).json({ status: "error", message: "Invalid format. Supported formats are 'csv' and 'csv.gz'." });
+    }
+
     try {
-        const workbook = XLSX.read(req.file.buffer, { type: 'buffer' });
+        // Only the first sheet is converted, so skip parsing the others
+        const workbook = XLSX.read(req.file.buffer, { type: 'buffer', sheets: 0, cellHTML: false });
         const sheetName = workbook.SheetNames[0]; // Assume first sheet
         const csvContent = XLSX.utils.sheet_to_csv(workbook.Sheets[sheetName]);
 
-        res.setHeader('Content-disposition', 'attachment; filename=converted_data.csv');
-        res.setHeader('Content-type', 'text/csv');
-        res.send(csvContent);
+        if (format === 'csv.gz') {
+            res.setHeader('Content-disposition', 'attachment; filename=converted_data.csv.gz');
+            res.setHeader('Content-type', 'application/gzip');
+            res.send(await gzip(csvContent));
+        } else {
+            res.setHeader('Content-disposition', 'attachment; filename=converted_data.csv');
+            res.setHeader('Content-type', 'text/csv');
+            res.send(csvContent);
+        }
     } catch (error) {
         console.error(`Error during XLSX to CSV conversion: ${error.message}`);
         res.status(500).json({ status: "error", message: `Error processing file: ${error.message}` });
@@ -372,7 +845,7 @@ app.post('/upload_xlsx_to_s3', upload.single('file'), async (req, res) => {
             ContentType: req.file.mimetype // Set content type from multer
         };
 
-        await s3Client.send(new PutObjectCommand(uploadParams));
+        await uploadToS3(uploadParams);
 
         console.log(`File '${originalFilename}' uploaded to s3://${UPLOAD_S3_BUCKET_NAME}/${s3FileKey}`);
 
@@ -384,13 +857,13 @@ app.post('/upload_xlsx_to_s3', upload.single('file'), async (req, res) => {
         });
 
     } catch (error) {
-        if (error instanceof NoCredentialsError) {
+        const error_code = error.name;
+        if (error_code === 'CredentialsProviderError') {
             console.error("Error: AWS credentials not found for S3 upload.");
             res.status(500).json({ status: "error", message: "AWS credentials not configured on the server." });
-        } else if (error instanceof ClientError) {
-            const error_code = error.name;
+        } else if (error.$metadata?.httpStatusCode !== undefined) {
             console.error(`S3 ClientError during upload: ${error_code} - ${error.message}`);
-            if (error_code === 'AccessDenied') {
+            if (error_code === 'AccessDenied' || error.$metadata.httpStatusCode === 403) {
                 res.status(500).json({ status: "error", message: "S3 access denied. Check IAM permissions for bucket." });
             } else {
                 res.status(500).json({ status: "error", message: `S3 upload failed: ${error.message}` });